@@ -1,7 +1,7 @@
 from . import xdi as xdi
-from .analysis import Analysis, operation  # noqa: F401
+from .analysis import Analysis, clear_caches, operation  # noqa: F401
 from .group import Group  # noqa: F401
 from .xafs_analysis import XAFSAnalysis  # noqa: F401
 
 # TODO: fill this in with appropriate star imports:
-__all__ = ["Analysis", "operation", "Group"]
+__all__ = ["Analysis", "operation", "Group", "clear_caches"]
@@ -1,85 +1,142 @@
 import warnings
-from collections.abc import Iterable, Mapping, Sequence
-from dataclasses import dataclass
-from functools import wraps
-from inspect import BoundArguments, signature
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable, Sequence
+from dataclasses import replace
+from inspect import signature
 from pathlib import Path
-from typing import Any, Protocol
-
-from .group import Group
+from typing import Any
+
+from .group import Group, fingerprint, shallow_copy
+from .operation import (  # noqa: F401
+    Operation,
+    OperatorFunction,
+    operation,
+)
 from .readers import read_aps_20bmb
 
+# Results of previously calculated operations, keyed by ``cache_key()``
+_result_cache: OrderedDict[Hashable, tuple[Group, ...]] = OrderedDict()
+# Entries kept in the cache, set to 0 to disable caching
+RESULT_CACHE_SIZE = 128
 
-class OperatorFunction(Protocol):
-    def __call__(self, groups: Sequence[Group], *args, **kwargs) -> list[Group]: ...
 
+def _cache_result(cache: OrderedDict, key: Hashable, value: Any):
+    cache[key] = value
+    while len(cache) > RESULT_CACHE_SIZE:
+        cache.popitem(last=False)
 
-@dataclass()
-class Operation:
-    """A discrete computational unit of analysis."""
 
-    desc: str
-    func: OperatorFunction
-    args: tuple[Any, ...]
-    kwargs: Mapping[Any, Any]
-    bound_arguments: BoundArguments | None = None
+def clear_caches():
+    """Forget all previously calculated results."""
+    _result_cache.clear()
 
 
-def operation(desc: str, defer=True):
-    """A decorator that"""
+def _histories(groups: Sequence[Group]) -> tuple:
+    return tuple(tuple(getattr(group, "past_operations", ())) for group in groups)
 
-    def wrapper(fn: OperatorFunction):
-        @wraps(fn)
-        def inner(analysis: "Analysis", *args, **kwargs) -> "Analysis":
-            new_operation = Operation(desc=desc, func=fn, args=args, kwargs=kwargs)
-            new_analysis = type(analysis)(
-                groups=analysis.groups,
-                operations=(*analysis.operations, new_operation),
-            )
-            if defer:
-                return new_analysis
-            else:
-                return new_analysis.calculate()
 
-        return inner
+def cache_key(op: Operation, groups: Sequence[Group]) -> Hashable | None:
+    """Build a key identifying *op* being applied to *groups*.
 
-    return wrapper
+    Only the fields in ``op.cache_fields`` are hashed. Returns ``None``
+    if the operation is not cached, or if either its arguments or the
+    groups' fields cannot be hashed.
+
+    """
+    if len(op.cache_fields) == 0 or RESULT_CACHE_SIZE == 0:
+        return None
+    fingerprints = tuple(fingerprint(group, op.cache_fields) for group in groups)
+    if None in fingerprints:
+        return None
+    key = (op, fingerprints, _histories(groups))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
 
 
 class Analysis:
-    groups: Iterable[Group]
+    groups: tuple[Group, ...]
     operations: tuple[Operation, ...]
+    past_operations: tuple[Operation, ...]
+    applied_funcs: frozenset[OperatorFunction]
 
     def __init__(
         self,
         groups: Iterable[Group] = (),
         operations: tuple[Operation, ...] = (),
+        applied_funcs: Iterable[OperatorFunction] = (),
+        past_operations: Sequence[Operation] = (),
     ):
-        self.groups = groups
+        self.groups = tuple(groups)
         self.operations = operations
+        self.past_operations = tuple(past_operations)
+        # Functions of the operations already applied to *groups*
+        self.applied_funcs = frozenset(applied_funcs)
+        self._computed: Analysis | None = None
+
+    def calculate(self, debug: bool = False):
+        """Apply all pending operations and produce a new analysis object.
+
+        The result is kept, so calling this method again (e.g. for
+        several plots) does not repeat the calculation.
+
+        Parameters
+        ==========
+        debug
+          If true, the calculation is always repeated without using
+          or updating any caches, and each operation in the groups'
+          ``past_operations`` includes the arguments it was called
+          with as ``bound_arguments``.
 
-    def calculate(self):
-        """Apply all pending operations and produce a new analysis object."""
-        groups = list(self.groups)
-        operations = self.operations
+        """
+        if self._computed is not None and not debug:
+            return self._computed
+        groups = self._run_operations(debug=debug)
+        if len(groups) == 0 and len(self.operations) > 0:
+            warnings.warn(f"Operation {self.operations[-1]} produced 0 valid groups")
+        computed = type(self)(
+            groups,
+            operations=(),
+            applied_funcs=self.applied_funcs | {op.func for op in self.operations},
+            past_operations=(*self.past_operations, *self.operations),
+        )
+        if not debug:
+            self._computed = computed
+        return computed
+
+    def _run_operations(self, debug: bool = False) -> tuple[Group, ...]:
+        groups = self.groups
         for op in self.operations:
-            op.bound_arguments = signature(op.func).bind(groups, *op.args, **op.kwargs)
-            groups = list(op.func(groups, *op.args, **op.kwargs))
+            if debug:
+                bound = signature(op.func).bind(groups, *op.args, **op.kwargs)
+                op = replace(op, bound_arguments=bound)
+                key = None
+            else:
+                key = cache_key(op, groups)
+            if key is not None and key in _result_cache:
+                # Reuse results from an identical previous calculation
+                _result_cache.move_to_end(key)
+                groups = tuple(shallow_copy(group) for group in _result_cache[key])
+            else:
+                groups = tuple(op.func(groups, *op.args, **op.kwargs))
+                if key is not None:
+                    cached = tuple(shallow_copy(group) for group in groups)
+                    _cache_result(_result_cache, key, cached)
             # Keep track of the operations that have already been performed on the groups
             for group in groups:
-                past_operations = getattr(group, "past_operations", ())
-                group.past_operations = (*past_operations, op)
-        groups = tuple(groups)
-        if len(groups) == 0:
-            warnings.warn(f"Operation {op} produced 0 valid groups")
-        return type(self)(
-            tuple(groups),
-            operations=[],
-        )
+                group.past_operations = (*getattr(group, "past_operations", ()), op)
+        return groups
 
     @classmethod
     def from_aps_20bmb(
-        cls, base: str | Path, glob: str = "", regex: str = ""
+        cls,
+        base: str | Path,
+        glob: str = "",
+        regex: str = "",
+        n_workers: int | None = None,
+        fast: bool = False,
     ) -> "Analysis":
         """Read XAFS data measured at APS beamline 20-BM-B.
 
@@ -106,7 +163,14 @@ class Analysis:
         regex
           If *base* is a directory, only files matching this regular
           expression will be read.
+        n_workers
+          How many files to read at once.
+        fast
+          If true, parse the data columns with numpy instead of
+          larch's ``read_ascii()``. Experimental.
 
         """
-        groups = read_aps_20bmb(base=base, glob=glob, regex=regex)
+        groups = read_aps_20bmb(
+            base=base, glob=glob, regex=regex, n_workers=n_workers, fast=fast
+        )
         return cls(groups=groups)
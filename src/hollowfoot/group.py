@@ -1,8 +1,13 @@
-from collections.abc import Sequence
+import hashlib
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from operator import attrgetter
+from typing import Any
 
+import numpy as np
+import numpy.typing as npt
 from larch.symboltable import Group as LarchGroup  # noqa: F401
 
-__all__ = ["Group"]
+__all__ = ["Group", "GroupSoA", "fingerprint", "shallow_copy"]
 
 
 class Group(LarchGroup):
@@ -11,3 +16,160 @@ class Group(LarchGroup):
     def __init__(self, *args, **kwargs):
         self.past_operations = ()
         super().__init__(*args, **kwargs)
+
+
+def shallow_copy(group: LarchGroup) -> LarchGroup:
+    """Copy *group*, sharing its attributes with the original.
+
+    Unlike ``copy.copy()``, which larch implements by copying every
+    attribute, the arrays in *group* are not duplicated.
+
+    """
+    new_group = object.__new__(type(group))
+    vars(new_group).update(vars(group))
+    return new_group
+
+
+class GroupSoA:
+    """Arrays from many groups, stacked field-by-field.
+
+    Each field is stored as a single 2D array with one row per
+    group. Groups with fewer points are padded with ``nan``, and the
+    number of valid points in each row is kept in *lengths*.
+
+    Indexing returns a :py:class:`Group` whose arrays are views into
+    the stacked arrays.
+
+    """
+
+    arrays: dict[str, np.ndarray]
+    lengths: np.ndarray
+
+    def __init__(self, arrays: Mapping[str, np.ndarray], lengths: Sequence[int]):
+        self.arrays = dict(arrays)
+        self.lengths = np.asarray(lengths, dtype=int)
+
+    @classmethod
+    def from_groups(
+        cls,
+        groups: Iterable[LarchGroup],
+        fields: Sequence[str],
+        dtype: npt.DTypeLike = np.float64,
+    ):
+        """Stack the arrays named in *fields* from each of *groups*.
+
+        The valid lengths are taken from the first field. The stacked
+        arrays are converted to *dtype*.
+
+        """
+        groups = list(groups)
+        columns = {}
+        for field in fields:
+            get_field = attrgetter(field)
+            columns[field] = [np.atleast_1d(get_field(group)) for group in groups]
+        first = columns[fields[0]] if len(fields) > 0 else [()] * len(groups)
+        lengths = [len(values) for values in first]
+        width = max(
+            (len(values) for column in columns.values() for values in column),
+            default=0,
+        )
+        arrays = {}
+        for field, column in columns.items():
+            array = np.full((len(groups), width), np.nan, dtype=dtype)
+            for idx, values in enumerate(column):
+                array[idx, : len(values)] = values
+            arrays[field] = array
+        return cls(arrays, lengths)
+
+    @classmethod
+    def by_length(
+        cls,
+        groups: Iterable[LarchGroup],
+        fields: Sequence[str],
+        dtype: npt.DTypeLike = np.float64,
+    ) -> list[tuple[list[int], "GroupSoA"]]:
+        """Stack *groups* in batches whose arrays have matching lengths.
+
+        Unlike :py:meth:`from_groups`, no padding is needed, so a few
+        long groups do not inflate the memory used by the others.
+
+        Returns
+        =======
+        batches
+          ``(indices, stacked)`` pairs, where *indices* are the
+          positions in *groups* of the groups in *stacked*.
+
+        """
+        groups = list(groups)
+        getters = [attrgetter(field) for field in fields]
+        indices: dict[tuple[int, ...], list[int]] = {}
+        for idx, group in enumerate(groups):
+            shape = tuple(np.size(get_field(group)) for get_field in getters)
+            indices.setdefault(shape, []).append(idx)
+        return [
+            (batch, cls.from_groups([groups[idx] for idx in batch], fields, dtype))
+            for batch in indices.values()
+        ]
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __getitem__(self, idx: int) -> Group:
+        length = self.lengths[idx]
+        return Group(**{field: arr[idx, :length] for field, arr in self.arrays.items()})
+
+    def __iter__(self) -> Iterator[Group]:
+        return (self[idx] for idx in range(len(self)))
+
+
+_Missing = object()
+
+
+def _update_hash(hasher: Any, value: Any) -> bool:
+    """Feed *value* into *hasher*, returning false if it cannot be hashed."""
+    if isinstance(value, np.ndarray):
+        hasher.update(f"{value.dtype}{value.shape}".encode())
+        hasher.update(np.ascontiguousarray(value).data.cast("B"))
+    elif value is None or isinstance(value, (str, bytes, bool, int, float, complex)):
+        hasher.update(repr(value).encode())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}{len(value)}".encode())
+        return all(_update_hash(hasher, item) for item in value)
+    elif isinstance(value, dict):
+        hasher.update(f"dict{len(value)}".encode())
+        return all(
+            _update_hash(hasher, key) and _update_hash(hasher, val)
+            for key, val in value.items()
+        )
+    elif isinstance(value, LarchGroup):
+        return _update_hash(hasher, _group_state(value))
+    else:
+        return False
+    return True
+
+
+def _group_state(group: LarchGroup) -> dict[str, Any]:
+    # Larch names groups after their ``id()``, so leave the name out
+    excluded = ("past_operations", "__name__")
+    return {key: val for key, val in vars(group).items() if key not in excluded}
+
+
+def fingerprint(group: LarchGroup, fields: Sequence[str] | None = None) -> str | None:
+    """Produce a digest of the data held in *group*.
+
+    Groups with identical data have identical fingerprints. Only the
+    attributes named in *fields* are included, if given; missing
+    attributes are allowed. Returns ``None`` if the attributes cannot
+    be reliably hashed.
+
+    """
+    if fields is None:
+        state = _group_state(group)
+    else:
+        # Keep missing fields distinct from e.g. ``None`` values
+        state = {field: getattr(group, field, _Missing) for field in fields}
+        state = {key: val for key, val in state.items() if val is not _Missing}
+    hasher = hashlib.blake2b(digest_size=16)
+    if not _update_hash(hasher, state):
+        return None
+    return hasher.hexdigest()
@@ -0,0 +1,106 @@
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from functools import wraps
+from inspect import BoundArguments, signature
+from typing import TYPE_CHECKING, Any, Protocol
+
+from .group import Group
+
+if TYPE_CHECKING:
+    from .analysis import Analysis
+
+__all__ = ["Operation", "operation"]
+
+
+class OperatorFunction(Protocol):
+    def __call__(self, groups: Sequence[Group], *args, **kwargs) -> list[Group]: ...
+
+
+@dataclass(frozen=True, eq=False)
+class Operation:
+    """A discrete computational unit of analysis.
+
+    Operations compare equal if they apply the same function with the
+    same arguments. They are hashable as long as their arguments are.
+
+    If *cache_fields* is not empty, the operation's results may be
+    reused for groups with identical values in these fields.
+
+    *bound_arguments* is only set for operations applied by
+    ``Analysis.calculate(debug=True)``.
+
+    """
+
+    desc: str
+    func: OperatorFunction
+    args: tuple[Any, ...]
+    kwargs: Mapping[Any, Any]
+    bound_arguments: BoundArguments | None = None
+    cache_fields: tuple[str, ...] = ()
+
+    def __eq__(self, other):
+        if not isinstance(other, Operation):
+            return NotImplemented
+        return (self.func, self.args, self.kwargs) == (
+            other.func,
+            other.args,
+            other.kwargs,
+        )
+
+    def __hash__(self):
+        try:
+            return hash((self.func, self.args, frozenset(self.kwargs.items())))
+        except TypeError:
+            # Callers treat unhashable operations as uncacheable
+            raise TypeError(
+                f"Operation {self.desc!r} has unhashable arguments."
+            ) from None
+
+
+def operation(desc: str, defer=True, cache: Sequence[str] = ()):
+    """A decorator that turns a function into an analysis operation.
+
+    Parameters
+    ==========
+    desc
+      Human-readable description of the operation.
+    defer
+      If false, the operation is calculated immediately.
+    cache
+      Names of every group field the function reads. If given, the
+      results are kept and reused when the operation is applied again
+      to groups with the same values in these fields. Only use this
+      for functions that depend on nothing else (e.g. no random
+      numbers or external files).
+
+    """
+
+    def wrapper(fn: OperatorFunction):
+        # Inspecting the signature is slow, so only do it once
+        sig = signature(fn)
+
+        @wraps(fn)
+        def inner(analysis: "Analysis", *args, **kwargs) -> "Analysis":
+            # Catch bad arguments now rather than when calculating
+            sig.bind(None, *args, **kwargs)
+            new_operation = Operation(
+                desc=desc,
+                func=fn,
+                args=args,
+                kwargs=kwargs,
+                cache_fields=tuple(cache),
+            )
+            new_analysis = type(analysis)(
+                groups=analysis.groups,
+                operations=(*analysis.operations, new_operation),
+                applied_funcs=analysis.applied_funcs,
+                past_operations=analysis.past_operations,
+            )
+            if defer:
+                return new_analysis
+            else:
+                return new_analysis.calculate()
+
+        return inner
+
+    return wrapper
@@ -1,10 +1,19 @@
+import os
 import re
 from collections.abc import Callable, Generator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
-from larch.io import read_ascii
+import numpy as np
+from larch.io import guess_beamline, read_ascii, set_array_labels
+from larch.io.columnfile import COMMENTCHARS, colname
 from larch.symboltable import Group
+from larch.utils import read_textfile
+
+_compile_regex = lru_cache(maxsize=128)(re.compile)
 
 
 def resolve_file_paths(base: Path, glob: str = "", regex: str = "") -> list[Path]:
@@ -18,16 +27,103 @@ def resolve_file_paths(base: Path, glob: str = "", regex: str = "") -> list[Path
     if base.is_file():
         return [base]
     # Apply glob matching
-    if glob:
+    if "/" in glob or "**" in glob:
         children = list(base.glob(glob))
     else:
-        children = list(base.iterdir())
-    # Apply regex
-    regex_ = re.compile(regex)
-    children = [path for path in children if regex_.search(str(path))]
+        # Flat directory listing, os.scandir avoids a stat per file
+        with os.scandir(base) as entries:
+            children = [
+                Path(entry.path)
+                for entry in entries
+                if entry.is_file() and (not glob or fnmatch(entry.name, glob))
+            ]
+    # Apply regex to the file names
+    if regex:
+        regex_ = _compile_regex(regex)
+        children = [path for path in children if regex_.search(path.name)]
     return children
 
 
+def parse_header_attrs(headers: Sequence[str]) -> dict[str, str]:
+    """Extract ``KEY: VAL`` and ``KEY = VAL`` header lines the same
+    way as :py:func:`larch.io.read_ascii`.
+
+    """
+    attrs = {}
+    for line in headers:
+        line = line.strip().replace("\t", " ")
+        if len(line) < 1:
+            continue
+        if line[0] in COMMENTCHARS:
+            line = line[1:].strip()
+        for separator in ":=":
+            if separator in line:
+                words = line.split(separator, 1)
+                break
+        else:
+            continue
+        keywords = words[0].split()
+        if len(keywords) == 1:
+            key = colname(keywords[0])
+            if key.startswith("_"):
+                key = key[1:]
+            attrs[key] = words[1].strip()
+    return attrs
+
+
+def read_ascii_fast(path: Path) -> Group:
+    """Read a column ASCII file, parsing the data with numpy.
+
+    Handles files made of comment lines followed by whitespace-separated
+    numeric columns, producing the same group as
+    :py:func:`larch.io.read_ascii`. Files with any other layout
+    (e.g. footers or comma-separated columns) are handed off to
+    ``read_ascii()`` instead.
+
+    """
+    path = Path(path)
+    # Decode (and decompress) the file exactly as read_ascii() does
+    lines = read_textfile(path).split("\n")
+    # Everything before the first non-comment line is the header
+    headers = []
+    for first_data_line, line in enumerate(lines):
+        line = line.strip()
+        if len(line) == 0:
+            continue
+        if line[0] not in COMMENTCHARS:
+            break
+        headers.append(line)
+    else:
+        return read_ascii(path)
+    try:
+        data = np.loadtxt(lines[first_data_line:], comments=None, ndmin=2)
+    except ValueError:
+        return read_ascii(path)
+    # Build the group the same way larch does
+    fpath = path.absolute()
+    filename = fpath.as_posix()
+    group = Group(
+        name=f"ascii_file {filename}",
+        path=filename,
+        filename=fpath.name,
+        header=headers,
+        data=data.transpose(),
+        array_labels=[],
+    )
+    group.attrs = Group(name=f"header attributes from {filename}")
+    for key, val in parse_header_attrs(headers).items():
+        setattr(group.attrs, key, val)
+    beamline = guess_beamline(headers)(headers)
+    if getattr(beamline, "energy_units", "eV") != "eV":
+        group.energy_units = beamline.energy_units
+    if getattr(beamline, "energy_column", 1) != 1:
+        group.energy_column = beamline.energy_column
+    if getattr(beamline, "mono_dspace", -1) > 0:
+        group.mono_dspace = beamline.mono_dspace
+    set_array_labels(group, labels=beamline.get_array_labels())
+    return group
+
+
 class NotADataFile:
     """Sentinel for if a specific file should be skipped because it has no data."""
 
@@ -39,10 +135,13 @@ def read_text_files(
     reader: Callable[[Path], Group],
     glob: str = "",
     regex="",
+    n_workers: int | None = None,
 ) -> Generator[Group, Any, None]:
     """Iterate data groups from text files.
 
-    Useful for making beamline-specific input functions.
+    Useful for making beamline-specific input functions. Files are
+    read concurrently, but groups are produced in the same order as
+    *paths*.
 
     Parameters
     ==========
@@ -50,16 +149,25 @@ def read_text_files(
       Path objects that will be opened and read for data.
     reader
       The function that knows how to load data in this specific format.
+    n_workers
+      How many files to read at once. If omitted, the default for
+      :py:class:`~concurrent.futures.ThreadPoolExecutor` is used.
 
     """
-    for path in paths:
-        maybe_group = reader(path)
-        if isinstance(maybe_group, NotADataFile):
-            continue
-        yield maybe_group
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        for maybe_group in executor.map(reader, paths):
+            if isinstance(maybe_group, NotADataFile):
+                continue
+            yield maybe_group
 
 
-def read_aps_20bmb(base: str | Path, glob: str = "", regex: str = "") -> list[Group]:
+def read_aps_20bmb(
+    base: str | Path,
+    glob: str = "",
+    regex: str = "",
+    n_workers: int | None = None,
+    fast: bool = False,
+) -> list[Group]:
     """Read XAFS data measured at APS beamline 20-BM-B.
 
     The first argument can be either a specific file to read, or a
@@ -85,14 +193,20 @@ def read_aps_20bmb(base: str | Path, glob: str = "", regex: str = "") -> list[Gr
     regex
       If *base* is a directory, only files matching this regular
       expression will be read.
+    n_workers
+      How many files to read at once.
+    fast
+      If true, parse the data columns with numpy instead of larch's
+      ``read_ascii()``. Experimental.
 
     """
     paths = resolve_file_paths(Path(base), glob=glob, regex=regex)
+    read = read_ascii_fast if fast else read_ascii
 
     def reader(fp):
         if fp.suffix == ".last":
             return NotADataFile()
-        return read_ascii(fp)
+        return read(fp)
 
-    groups = list(read_text_files(paths, reader))
+    groups = list(read_text_files(paths, reader, n_workers=n_workers))
     return groups
@@ -1,22 +1,43 @@
-from collections.abc import Sequence
-from copy import copy
+from collections.abc import Callable, Iterable, Sequence
 from functools import wraps
 
 import numpy as np
+import numpy.typing as npt
 from larch.io import merge_groups
 from larch.plot import bokeh_xafsplots as xafsplots
 from larch.symboltable import Group
 from larch.xafs import autobk, pre_edge
 
 from hollowfoot.analysis import Analysis, operation
+from hollowfoot.group import GroupSoA, shallow_copy
+
+
+def map_groups(func: Callable, groups: Iterable[Group], *args, **kwargs) -> list[Group]:
+    """Apply a larch function to a copy of each group.
+
+    The copies share the original arrays, since larch attaches new
+    arrays for its results rather than modifying the inputs.
+
+    """
+    new_groups = []
+    for group in groups:
+        new_group = shallow_copy(group)
+        func(new_group, *args, **kwargs)
+        new_groups.append(new_group)
+    return new_groups
+
+
+def shares_grid(groups: Sequence[Group], xarray: str = "energy") -> bool:
+    """Check whether all *groups* were measured on identical x-arrays."""
+    if len(groups) == 0:
+        return False
+    first = getattr(groups[0], xarray)
+    return all(np.array_equal(getattr(group, xarray), first) for group in groups[1:])
 
 
 class XAFSAnalysis(Analysis):
     def is_flattened(self):
-        print([op.func for op in self.past_operations])
-        return self.fit_edge_jump.__wrapped__ in [
-            op.func for op in self.past_operations
-        ]
+        return self.fit_edge_jump.__wrapped__ in self.applied_funcs
 
     @operation(desc="Calculate µ(E)")
     def to_mu(
@@ -25,15 +46,31 @@ class XAFSAnalysis(Analysis):
         signal: str,
         reference: str | None = None,
         is_transmission=False,
+        dtype: npt.DTypeLike = np.float64,
     ):
+        """Calculate µ(E) from the *signal* and *reference* arrays.
 
-        for group in groups:
-            ydata = getattr(group, signal)
-            rdata = getattr(group, reference) if reference is not None else 1
-            mu = ydata / rdata
+        Passing ``dtype=np.float32`` halves the memory used by µ(E),
+        which is usually ample precision for measured intensities.
+
+        """
+        groups = list(groups)
+        fields = [signal] + ([reference] if reference is not None else [])
+        mus: list[np.ndarray] = [np.empty(0)] * len(groups)
+        # Batch groups with matching lengths so numpy can process them together
+        for indices, stacked in GroupSoA.by_length(groups, fields=fields, dtype=dtype):
+            mu = stacked.arrays[signal]
+            if reference is not None:
+                np.divide(mu, stacked.arrays[reference], out=mu)
             if is_transmission:
-                mu = -np.log(mu)
-            yield Group(mu=mu, energy=getattr(group, energy))
+                np.log(mu, out=mu)
+                np.negative(mu, out=mu)
+            for idx, row in zip(indices, mu):
+                mus[idx] = row
+        return [
+            Group(mu=mu, energy=getattr(group, energy))
+            for group, mu in zip(groups, mus)
+        ]
 
     def summarize(self):
         new_analysis = self.calculate()
@@ -44,6 +81,14 @@ class XAFSAnalysis(Analysis):
 
     @operation(desc="merge data groups")
     def merge(groups, *args, **kwargs):
+        xarray = kwargs.get("xarray", "energy")
+        uses_defaults = (
+            len(args) == 0 and "master" not in kwargs and "kind" not in kwargs
+        )
+        if uses_defaults and shares_grid(groups, xarray):
+            # Interpolating onto the groups' own grid is exact for any
+            # kind, so skip building a cubic spline for every group
+            kwargs = {**kwargs, "kind": "linear"}
         return [merge_groups(groups, *args, **kwargs)]
 
     @wraps(xafsplots.plot_mu)
@@ -74,16 +119,15 @@ class XAFSAnalysis(Analysis):
         fig.show(show=True)
         return new_analysis
 
-    @operation(desc="fit edge jump in µ(E)")
+    @operation(
+        desc="fit edge jump in µ(E)", cache=("energy", "mu", "e0", "atsym", "edge")
+    )
     def fit_edge_jump(groups, *args, **kwargs):
-        for group in groups:
-            new_group = copy(group)
-            pre_edge(new_group, *args, **kwargs)
-            yield new_group
+        return map_groups(pre_edge, groups, *args, **kwargs)
 
-    @operation(desc="subtract background to produce χ(k)")
+    @operation(
+        desc="subtract background to produce χ(k)",
+        cache=("energy", "mu", "e0", "ek0", "edge_step", "atsym", "edge"),
+    )
     def subtract_background(groups, *args, **kwargs):
-        for group in groups:
-            new_group = copy(group)
-            autobk(new_group, *args, **kwargs)
-            yield new_group
+        return map_groups(autobk, groups, *args, **kwargs)
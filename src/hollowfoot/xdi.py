@@ -15,16 +15,21 @@ For going in the other direction, use ``dump()``.
 
 """
 
-__all__ = ["load", "dump"]
+__all__ = ["load", "load_file", "dump"]
 
-import ast
+import io
 import re
+from array import array
 from collections.abc import Generator, Iterable
 from dataclasses import dataclass
-from enum import Enum
+from enum import IntEnum
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
+import numpy as np
+import numpy.typing as npt
 import xarray as xr
 from xarray.backends import BackendEntrypoint
 
@@ -33,7 +38,7 @@ class XDIMalformed(Exception):
     pass
 
 
-class Role(int, Enum):
+class Role(IntEnum):
     VERSION = 0
     HEADER_NAME = 1
     HEADER_VALUE = 2
@@ -42,81 +47,149 @@ class Role(int, Enum):
     DATUM = 5
 
 
-@dataclass()
+# Module-level aliases skip the enum class lookup in the token loops
+_VERSION = Role.VERSION
+_HEADER_NAME = Role.HEADER_NAME
+_HEADER_VALUE = Role.HEADER_VALUE
+_USER_COMMENT = Role.USER_COMMENT
+_COLUMN_LABEL = Role.COLUMN_LABEL
+_DATUM = Role.DATUM
+
+
+@dataclass(slots=True)
 class Token:
     value: str
     role: Role
 
 
-number_pattern = re.compile("[-_0-9.e]+")
+def as_number(value: str) -> float:
+    """Convert *value* to a float, or ``nan`` if it is not a number."""
+    try:
+        return float(value)
+    except ValueError:
+        return float("nan")
 
 
-def as_number(value: str) -> float | int:
-    # Make sure only valid number characters are present
-    if number_pattern.match(value):
-        return ast.literal_eval(value)
-    else:
-        return float("nan")
+# Patterns are used with ``.match()`` on single lines, so they start
+# with the literal "#" and use "[ \t]" rather than "\s"
+field_end_pattern = re.compile(r"#[ \t]*///+")
+header_end_pattern = re.compile(r"#[ \t]*---+")
+version_pattern = re.compile(
+    r"#[ \t]*(?P<xdi_version>XDI/[^ \t]+)"
+    r"(?P<other_versions>(?:[ \t]+[^ \t/]+/[^ \t/]+)*)"
+)
+header_pattern = re.compile(r"#[ \t]*(?P<header_name>[^:]+):(?P<header_value>.+)")
+user_comment_pattern = re.compile(r"#[ \t]*(?P<comment>.*)")
+column_labels_pattern = re.compile("#")
+# Header end line plus column labels and blank lines, i.e. everything
+# before the data rows
+data_start_pattern = re.compile(
+    r"^#[ \t]*---+[ \t\r]*(?:\r?\n(?:[ \t\r]*(?=\n)|#.*))*\r?\n?", re.MULTILINE
+)
+
+
+def line_pattern(**patterns: re.Pattern) -> re.Pattern:
+    """Combine line patterns into one, in order of precedence.
 
+    The name of the alternative that matched is available as the
+    match's ``lastgroup``.
+
+    """
+    return re.compile(
+        "|".join(f"(?P<{name}>{pattern.pattern})" for name, pattern in patterns.items())
+    )
+
+
+# The kinds of line that are allowed in each section of the file
+section_patterns = {
+    section: line_pattern(
+        field_end=field_end_pattern, header_end=header_end_pattern, **patterns
+    )
+    for section, patterns in [
+        ("version", {"version": version_pattern}),
+        ("header", {"header": header_pattern}),
+        ("user_comments", {"user_comment": user_comment_pattern}),
+        ("data", {"column_labels": column_labels_pattern}),
+    ]
+}
+# Header lines (e.g. "# XDI/1.0", "# Mono.name: Si 111") recur across
+# files from the same source, so remember how they were classified
+_match_line = {
+    section: lru_cache(maxsize=1024)(pattern.match)
+    for section, pattern in section_patterns.items()
+}
 
-field_end_pattern = re.compile(r"#\s*///+\s*")
-header_end_pattern = re.compile(r"#\s*---+\s*")
-version_pattern = re.compile(r"#\s*(XDI/[^ \t]+)((?:[ \t]+[^ \t/]+/[^ \t/]+)*)\s*")
-header_pattern = re.compile(r"#\s*([^:]+):(.+)")
-user_comment_pattern = re.compile(r"#\s*(.*)")
-space_separated_pattern = re.compile("[^ \t]+")  # Individual labels, not the whole line
 
+def tokenize(text: str | Iterable[str]) -> Generator[Token]:
+    """Lexxer that turns an XDI formatted text into Line tokens.
 
-def tokenize(text: str) -> Generator[Token]:
-    """Lexxer that turns an XDI formatted text into Line tokens."""
+    *text* can also be an iterable of lines, e.g. an open file, so
+    that the lines are read one at a time.
+
+    """
+    if isinstance(text, str):
+        text = io.StringIO(text)
     current_section = "version"
-    for line in text.split("\n"):
+    for line in text:
+        line = line.rstrip("\r\n")
+        # Data rows are the bulk of the file and never start with "#"
+        if current_section == "data" and not line.startswith("#"):
+            for datum in line.split():
+                yield Token(datum, _DATUM)
+            continue
+        # Classify the line with a single regex match
+        match = _match_line[current_section](line)
+        if match is None:
+            raise XDIMalformed(line)
+        kind = match.lastgroup
         # Check for field- and header-end lines
-        if match := field_end_pattern.match(line):
+        if kind == "field_end":
             current_section = "user_comments"
-            continue
-        elif match := header_end_pattern.match(line):
+        elif kind == "header_end":
             current_section = "data"
-            continue
         # Check for a version line
-        elif current_section == "version" and (match := version_pattern.match(line)):
+        elif kind == "version":
             current_section = "header"
-            grp1, grp2 = match.groups()
+            grp1, grp2 = match.group("xdi_version", "other_versions")
             versions = [grp1, *grp2.strip().split(" ")]
             versions = [version for version in versions if version != ""]
-            yield from (Token(ver, Role.VERSION) for ver in versions)
-            continue
+            yield from (Token(ver, _VERSION) for ver in versions)
         # Check for header fields
-        elif current_section == "header" and (match := header_pattern.match(line)):
-            name, value = match.groups()
-            yield Token(name.strip(), Role.HEADER_NAME)
-            yield Token(value.strip(), Role.HEADER_VALUE)
-            continue
+        elif kind == "header":
+            name, value = match.group("header_name", "header_value")
+            yield Token(name.strip(), _HEADER_NAME)
+            yield Token(value.strip(), _HEADER_VALUE)
         # Check for user comments
-        elif current_section == "user_comments" and (
-            match := user_comment_pattern.match(line)
-        ):
-            yield Token(match.group(1), Role.USER_COMMENT)
+        elif kind == "user_comment":
+            yield Token(match.group("comment"), _USER_COMMENT)
         # Column labels
-        elif current_section == "data" and line.startswith("#"):
-            for match in space_separated_pattern.finditer(line.lstrip("#")):
-                yield Token(match.group(), Role.COLUMN_LABEL)
-        elif current_section == "data":
-            for match in space_separated_pattern.finditer(line):
-                yield Token(match.group(), Role.DATUM)
-        else:
-            raise XDIMalformed(line)
+        elif kind == "column_labels":
+            for label in line.lstrip("#").split():
+                yield Token(label, _COLUMN_LABEL)
 
 
-def parse(tokens: Iterable[Token]) -> xr.Dataset:
-    """Convert tokens from ``tokenize()`` into a dataset."""
+def parse(
+    tokens: Iterable[Token],
+    data_array: np.ndarray | None = None,
+    dtype: npt.DTypeLike = np.float64,
+) -> xr.Dataset:
+    """Convert tokens from ``tokenize()`` into a dataset.
+
+    If *data_array* is given, it is used as the (row, column) data
+    instead of any DATUM tokens. The data are stored as *dtype*.
+
+    """
     tokens_ = iter(tokens)
     attrs: dict[str, Any] = {}
+    versions: dict[str, str] = {}
+    headers: dict[str, str] = {}
+    comments = []
     labels = []
-    data = []
+    # Packed C doubles, shared with numpy below without a copy
+    data = array("d")
     # Check that the XDI version is first
     token = next(tokens_)
-    if token.role == Role.VERSION and token.value.startswith("XDI/"):
+    if token.role == _VERSION and token.value.startswith("XDI/"):
         attrs["xdi_version"] = token.value.split("/")[1]
     else:
         raise XDIMalformed(f"Invalid version token {token}.")
@@ -126,34 +199,58 @@ def parse(tokens: Iterable[Token]) -> xr.Dataset:
             token = next(tokens_)
         except StopIteration:
             break
-        if token.role == Role.VERSION:
+        if token.role == _VERSION:
             package, version = token.value.split("/")
-            attrs.setdefault("versions", {})[package] = version
-        elif token.role == Role.HEADER_NAME:
+            versions[package] = version
+        elif token.role == _HEADER_NAME:
             # Header name, so next token should be the value
-            headers = attrs.setdefault("header", {})
             headers[token.value] = next(tokens_).value
-        elif token.role == Role.USER_COMMENT:
-            # Combine user comments
-            previous_comment = attrs.get("user_comment", "")
-            comment = "\n".join([previous_comment, token.value]).strip("\n")
-            attrs["user_comment"] = comment
-        elif token.role == Role.COLUMN_LABEL:
+        elif token.role == _USER_COMMENT:
+            # User comments get combined once they have all been read
+            comments.append(token.value)
+        elif token.role == _COLUMN_LABEL:
             labels.append(token.value)
-        elif token.role == Role.DATUM:
+        elif token.role == _DATUM:
             data.append(as_number(token.value))
         else:
             raise XDIMalformed(f"Unknown token role: {token}")
+    if len(versions) > 0:
+        attrs["versions"] = versions
+    if len(headers) > 0:
+        attrs["header"] = headers
+    if len(comments) > 0:
+        # Blank comment lines are dropped
+        attrs["user_comment"] = "\n".join(line for line in comments if line != "")
     # Align the data with their column labels
     if len(labels) == 0:
+        if len(data) > 0 or (data_array is not None and data_array.size > 0):
+            raise XDIMalformed("Found data values but no column labels.")
         coords = {}
         data_vars = {}
     else:
-        coords = {labels[0]: data[:: len(labels)]}
-        dv = {
-            label: data[idx + 1 :: len(labels)] for idx, label in enumerate(labels[1:])
+        if data_array is None:
+            if len(data) % len(labels) != 0:
+                raise XDIMalformed(
+                    f"Found {len(data)} data values for {len(labels)} labels."
+                )
+            data_array = np.frombuffer(data, dtype=np.float64)
+            data_array = data_array.reshape(-1, len(labels))
+            # Column-major, so each column is a contiguous view
+            data_array = np.asarray(data_array, dtype=dtype, order="F")
+        elif data_array.size == 0:
+            data_array = np.empty((0, len(labels)), dtype=dtype)
+        else:
+            # Columns are views into the given array, copied only to change dtype
+            data_array = np.asarray(data_array, dtype=dtype)
+        if data_array.shape[1] != len(labels):
+            raise XDIMalformed(
+                f"Found {data_array.shape[1]} data columns for {len(labels)} labels."
+            )
+        coords = {labels[0]: data_array[:, 0]}
+        data_vars = {
+            label: (labels[0], data_array[:, idx + 1])
+            for idx, label in enumerate(labels[1:])
         }
-        data_vars = {label: (coords.keys(), data) for label, data in dv.items()}
     return xr.Dataset(
         coords=coords,
         data_vars=data_vars,
@@ -161,7 +258,7 @@ def parse(tokens: Iterable[Token]) -> xr.Dataset:
     )
 
 
-def load(xdi_text: str) -> xr.Dataset:
+def load(xdi_text: str, dtype: npt.DTypeLike = np.float64) -> xr.Dataset:
     """Convert an XDI formatted string to an Xarray.
 
     Non-data parts of the XDI file are included in the dataset's
@@ -183,11 +280,17 @@ def load(xdi_text: str) -> xr.Dataset:
     XDI text. Headers like ``"Column.1"`` are left as is in the
     *dataset*; it is left up to the client to interpret these headers properly.
 
+    All data columns are read as *dtype*, including columns written as
+    integers (e.g. detector counts).
+
     Parameters
     ==========
     xdi_text
       A string representing the input dataset in XDI format, suitable
       for passing the an open file objects ``.write()`` method.
+    dtype
+      Data type for the data arrays. ``np.float32`` halves the memory
+      used, at the cost of precision beyond ~7 significant digits.
 
     Returns
     =======
@@ -195,15 +298,92 @@ def load(xdi_text: str) -> xr.Dataset:
       An Xarray dataset with the data to save.
 
     """
+    # Parse the data rows in bulk with numpy, and only tokenize the headers
+    if match := data_start_pattern.search(xdi_text):
+        body = xdi_text[match.end() :]
+        try:
+            if body == "" or body.isspace():
+                # Header only, so skip numpy's "no data" warning
+                data = np.empty((0, 0), dtype=dtype)
+            else:
+                data = np.loadtxt(io.StringIO(body), dtype=dtype, comments="#", ndmin=2)
+        except ValueError:
+            # Fall back to parsing every number as a token
+            pass
+        else:
+            tokens = tokenize(xdi_text[: match.end()])
+            return parse(tokens, data_array=data, dtype=dtype)
     tokens = tokenize(xdi_text)
-    dataset = parse(tokens)
+    dataset = parse(tokens, dtype=dtype)
     return dataset
 
 
+def load_file(fp: TextIO, dtype: npt.DTypeLike = np.float64) -> xr.Dataset:
+    """Convert an open XDI file to an Xarray.
+
+    Equivalent to ``load(fp.read())``, except that the data rows are
+    handed to numpy straight from the file, so the file is never held
+    in memory as a single string.
+
+    Parameters
+    ==========
+    fp
+      A file object opened in text mode and positioned at the start
+      of the XDI text.
+    dtype
+      Data type for the data arrays.
+
+    Returns
+    =======
+    dataset
+      An Xarray dataset with the data to save.
+
+    """
+    header = []
+    # Everything up to the header end line
+    for line in fp:
+        header.append(line)
+        if header_end_pattern.match(line):
+            break
+    else:
+        return parse(tokenize(header), dtype=dtype)
+    # Column labels, up to the first data row
+    first_row = ""
+    for line in fp:
+        if line.isspace():
+            continue
+        if not line.startswith("#"):
+            first_row = line
+            break
+        header.append(line)
+    try:
+        if first_row == "":
+            # Header only, so skip numpy's "no data" warning
+            data = np.empty((0, 0), dtype=dtype)
+        else:
+            data = np.loadtxt(
+                chain([first_row], fp), dtype=dtype, comments="#", ndmin=2
+            )
+    except ValueError:
+        # Fall back to parsing every number as a token
+        fp.seek(0)
+        return load(fp.read(), dtype=dtype)
+    return parse(tokenize(header), data_array=data, dtype=dtype)
+
+
 class XDIBackendEntrypoint(BackendEntrypoint):
+    """Xarray backend for XDI files.
+
+    The only state shared between calls is a cache of how header lines
+    were classified. It depends only on the line text and is safe to
+    use from several threads, so files can be opened concurrently,
+    e.g. with ``xr.open_mfdataset(..., engine="xdi", parallel=True)``.
+
+    """
+
     description = "Use .xdi files in Xarray"
     url = "https://github.com/spc-group/hollowfoot?tab=readme-ov-file#xas-data-interchange-format-xdi"
-    open_dataset_parameters = ["filename_or_obj", "drop_variables"]
+    open_dataset_parameters = ["filename_or_obj", "drop_variables", "dtype"]
 
     def open_dataset(
         self,
@@ -212,9 +392,12 @@ class XDIBackendEntrypoint(BackendEntrypoint):
         drop_variables=None,
         # other backend specific keyword arguments
         # `chunks` and `cache` DO NOT go here, they are handled by xarray
+        dtype=np.float64,
     ):
         with open(filename_or_obj) as fp:
-            dataset = load(fp.read())
+            dataset = load_file(fp, dtype=dtype)
+        if drop_variables is not None:
+            dataset = dataset.drop_vars(drop_variables, errors="ignore")
         return dataset
 
     def guess_can_open(self, filename_or_obj):
@@ -274,11 +457,11 @@ def dump(dataset: xr.Dataset) -> str:
     lines.append("# -----")
     labels = [*dataset.coords.keys(), *dataset.data_vars.keys()]
     lines.append(f"# {' '.join(labels)}")
-    # Data in tab-separated format
-    df = dataset.to_pandas().reset_index()
-    data_rows = df.to_csv(sep="\t", header=False, index=False).split("\n")
-    data_rows = [f"  {row}" for row in data_rows]
-    lines.extend(data_rows)
+    # Data in tab-separated format, formatted column-wise by numpy
+    columns = [dataset[label].values.astype(str) for label in labels]
+    if len(columns) > 0:
+        rows = np.column_stack(columns).tolist()
+        lines.extend(["  " + "\t".join(row) for row in rows])
     # Clean up the file ending (make sure there's a newline)
     text = "\n".join(lines).rstrip() + "\n"
     return text
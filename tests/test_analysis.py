@@ -4,7 +4,8 @@ from pathlib import Path
 import numpy as np
 import pytest
 
-from hollowfoot import Analysis, Group, operation
+from hollowfoot import Analysis, Group, clear_caches, operation
+from hollowfoot.operation import Operation
 
 data_dir = Path(__file__).parent / "data"
 
@@ -55,10 +56,15 @@ def test_operation_call_immediately():
 
 def test_operation_binds_arguments():
     """Check that an operation includes bound arguments in it's attributes."""
-    anl = TestAnalysis(groups=(Group(),)).noop().calculate()
-    (group,) = anl.groups
+    (group,) = TestAnalysis(groups=(Group(),)).noop().calculate().groups
+    (op,) = group.past_operations
+    assert op.bound_arguments is None
+    # Only keep the arguments when debugging
+    anl = TestAnalysis(groups=(Group(),)).noop()
+    (group,) = anl.calculate(debug=True).groups
     (op,) = group.past_operations
     assert isinstance(op.bound_arguments, BoundArguments)
+    assert op.bound_arguments.args[0] is anl.groups
 
 
 def test_read_aps_20bmb(tmp_path):
@@ -75,6 +81,7 @@ def test_past_operations(analysis):
     # Do another one
     analysis = analysis.noop().calculate()
     assert len(analysis.groups[0].past_operations) == 2
+    assert len(analysis.past_operations) == 2
 
 
 def test_past_operations_chain(analysis):
@@ -92,3 +99,111 @@ def test_past_operations_chain(analysis):
     assert getattr(anl.groups[0], "past_op_count", 0) == 0
     anl = anl.calculate()
     assert getattr(anl.groups[0], "past_op_count", 0) == 1
+
+
+def test_calculate_reuses_results():
+    """Are identical calculations only run once?"""
+    calls = []
+
+    class CountingAnalysis(Analysis):
+        @operation("count calls", cache=("x",))
+        def count(groups, label):
+            calls.append(label)
+            return [Group(x=group.x) for group in groups]
+
+    CountingAnalysis(groups=(Group(x=np.arange(5)),)).count("a").calculate()
+    CountingAnalysis(groups=(Group(x=np.arange(5)),)).count("a").calculate()
+    assert calls == ["a"]
+    # Different data should not use the cached result
+    CountingAnalysis(groups=(Group(x=np.arange(6)),)).count("a").calculate()
+    assert calls == ["a", "a"]
+    # Fields the operation does not read are not part of the key
+    group = Group(x=np.arange(5), unhashable=object())
+    CountingAnalysis(groups=(group,)).count("a").calculate()
+    assert calls == ["a", "a"]
+
+
+def test_calculate_once(analysis):
+    anl = analysis.noop()
+    assert anl.calculate() is anl.calculate()
+
+
+def test_operation_checks_arguments(analysis):
+    with pytest.raises(TypeError):
+        analysis.noop(color="blue", size=5)
+
+
+def test_cache_invalidation(monkeypatch):
+    """Are results reused for groups with the same data, but not
+    after the data change?
+
+    """
+    calls = []
+
+    class CountingAnalysis(Analysis):
+        @operation("count calls", cache=("x",))
+        def count(groups, label):
+            calls.append(label)
+            return [Group(x=group.x) for group in groups]
+
+        @operation("count calls without caching")
+        def count_uncached(groups, label):
+            calls.append(label)
+            return [Group(x=group.x) for group in groups]
+
+    group = Group(x=np.arange(5))
+    anl = CountingAnalysis(groups=(group,))
+    anl.count("b").calculate()
+    anl.count("b").calculate()
+    assert calls == ["b"]
+    anl.count("c").calculate()
+    assert calls == ["b", "c"]
+    # Modifying the group in place invalidates the cached results
+    group.x = np.arange(6)
+    anl.count("b").calculate()
+    assert calls == ["b", "c", "b"]
+    # Clearing the caches forces a new calculation
+    clear_caches()
+    anl.count("b").calculate()
+    assert calls == ["b", "c", "b", "b"]
+    # Operations are only cached if they ask to be
+    anl.count_uncached("d").calculate()
+    anl.count_uncached("d").calculate()
+    assert calls == ["b", "c", "b", "b", "d", "d"]
+    # Caching can be turned off
+    monkeypatch.setattr("hollowfoot.analysis.RESULT_CACHE_SIZE", 0)
+    anl.count("b").calculate()
+    assert calls == ["b", "c", "b", "b", "d", "d", "b"]
+
+
+def test_operation_equality():
+    def func(groups, color="red"):
+        return groups
+
+    op = Operation(desc="first", func=func, args=(1,), kwargs={"color": "red"})
+    same = Operation(desc="second", func=func, args=(1,), kwargs={"color": "red"})
+    different = Operation(desc="first", func=func, args=(1,), kwargs={"color": "blue"})
+    assert op == same
+    assert hash(op) == hash(same)
+    assert op != different
+
+
+def test_operation_unhashable_arguments(analysis):
+    """Operations with e.g. list arguments still compare, but skip the caches."""
+
+    def func(groups, colors=()):
+        return groups
+
+    op = Operation(desc="first", func=func, args=(), kwargs={"colors": ["red"]})
+    same = Operation(desc="second", func=func, args=(), kwargs={"colors": ["red"]})
+    assert op == same
+    assert op in (same,)
+    with pytest.raises(TypeError):
+        hash(op)
+    # Calculating still works without the caches
+    new_anl = analysis.noop(color=["red", "blue"]).calculate()
+    assert len(new_anl.groups) == 1
+    assert (
+        new_anl.past_operations[-1]
+        == analysis.noop(color=["red", "blue"]).operations[-1]
+    )
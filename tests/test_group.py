@@ -0,0 +1,48 @@
+import numpy as np
+from larch.symboltable import Group as LarchGroup
+
+from hollowfoot.group import Group, GroupSoA, fingerprint
+
+
+def test_group_soa_ragged():
+    groups = [
+        LarchGroup(energy=np.arange(3.0), mu=np.ones(3)),
+        LarchGroup(energy=np.arange(5.0), mu=np.ones(5)),
+    ]
+    stacked = GroupSoA.from_groups(groups, fields=["energy", "mu"])
+    assert len(stacked) == 2
+    assert stacked.arrays["mu"].shape == (2, 5)
+    assert np.all(np.isnan(stacked.arrays["mu"][0, 3:]))
+    np.testing.assert_equal(stacked.lengths, [3, 5])
+    # Individual groups are trimmed views into the stacked arrays
+    first, second = stacked
+    assert isinstance(first, Group)
+    np.testing.assert_equal(first.energy, [0, 1, 2])
+    assert len(second.mu) == 5
+    assert np.shares_memory(second.mu, stacked.arrays["mu"])
+
+
+def test_group_soa_by_length():
+    groups = [
+        LarchGroup(energy=np.arange(3.0), mu=np.ones(3)),
+        LarchGroup(energy=np.arange(5.0), mu=np.ones(5)),
+        LarchGroup(energy=np.arange(3.0), mu=np.zeros(3)),
+    ]
+    batches = GroupSoA.by_length(groups, fields=["energy", "mu"])
+    assert [indices for indices, _ in batches] == [[0, 2], [1]]
+    # No padding is needed within a batch
+    (_, short), (_, long) = batches
+    assert short.arrays["mu"].shape == (2, 3)
+    assert long.arrays["mu"].shape == (1, 5)
+    np.testing.assert_equal(short.arrays["mu"][1], [0, 0, 0])
+
+
+def test_fingerprint():
+    group = Group(x=np.arange(5), label="spam")
+    assert fingerprint(group) == fingerprint(Group(x=np.arange(5), label="spam"))
+    assert fingerprint(group) != fingerprint(Group(x=np.arange(6), label="spam"))
+    # History does not affect the data fingerprint
+    group.past_operations = ("eggs",)
+    assert fingerprint(group) == fingerprint(Group(x=np.arange(5), label="spam"))
+    # Unhashable attributes disable the fingerprint
+    assert fingerprint(Group(x=object())) is None
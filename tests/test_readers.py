@@ -1,6 +1,16 @@
 from pathlib import Path
 
-from hollowfoot.readers import read_aps_20bmb, resolve_file_paths
+import numpy as np
+import pytest
+from larch.io import read_ascii
+
+from hollowfoot.readers import (
+    NotADataFile,
+    read_aps_20bmb,
+    read_ascii_fast,
+    read_text_files,
+    resolve_file_paths,
+)
 
 data_dir = Path(__file__).parent / "data"
 
@@ -47,3 +57,68 @@ def test_read_aps_20bmb(tmp_path):
     data_file = data_dir / "Ni-foil-EXAFS.0002"
     groups = read_aps_20bmb(data_file)
     assert len(groups) == 1
+
+
+def test_read_text_files_order():
+    paths = [Path(f"scan.{idx:04d}") for idx in range(20)]
+
+    def reader(path):
+        if path.suffix == ".0003":
+            return NotADataFile()
+        return path.suffix
+
+    groups = list(read_text_files(paths, reader, n_workers=4))
+    assert groups == [path.suffix for path in paths if path.suffix != ".0003"]
+
+
+def test_resolve_directory_skips_subdirectories(tmp_path):
+    good_path = tmp_path / "spam.eggs"
+    good_path.touch()
+    (tmp_path / "spam.dir").mkdir()
+    assert resolve_file_paths(tmp_path) == [good_path]
+    assert resolve_file_paths(tmp_path, glob="spam.*") == [good_path]
+
+
+def test_read_ascii_fast():
+    """Does the numpy reader match larch's reader?"""
+    data_file = data_dir / "Ni-foil-EXAFS.0002"
+    expected = read_ascii(data_file)
+    group = read_ascii_fast(data_file)
+    assert group.array_labels == expected.array_labels
+    assert group.header == expected.header
+    assert vars(group.attrs) == vars(expected.attrs)
+    np.testing.assert_array_equal(group.data, expected.data)
+    np.testing.assert_array_equal(group.mono_energy, expected.mono_energy)
+
+
+ascii_files = {
+    "colon headers": "# Sample: Ni foil\n# Edge: K\n# energy mu\n1.0 2.0\n3.0 4.0\n",
+    "equals headers": "# sample = Ni foil\n# energy mu\n1.0 2.0\n3.0 4.0\n",
+    "other comment chars": "; Sample: Ni\n% Edge: K\n! energy mu\n1.0 2.0\n3.0 4.0\n",
+    "blank lines": "# Sample: Ni\n\n# energy mu\n\n1.0 2.0\n\n3.0 4.0\n\n",
+    "tabs": "#\tSample:\tNi\n#\tenergy\tmu\n1.0\t2.0\n3.0\t4.0\n",
+    "no header": "1.0 2.0\n3.0 4.0\n",
+    "crlf": "# Sample: Ni\r\n# energy mu\r\n1.0 2.0\r\n3.0 4.0\r\n",
+}
+
+
+@pytest.mark.parametrize("text", ascii_files.values(), ids=ascii_files.keys())
+@pytest.mark.parametrize("encoding", ["utf-8", "latin-1"])
+def test_read_ascii_fast_variants(tmp_path, text, encoding):
+    """Does the numpy reader match larch's reader for other layouts?"""
+    data_file = tmp_path / "scan.0001"
+    data_file.write_bytes(text.replace("Ni", "Ni (25 °C)").encode(encoding))
+    expected = read_ascii(data_file)
+    group = read_ascii_fast(data_file)
+    assert group.array_labels == expected.array_labels
+    assert group.header == expected.header
+    assert vars(group.attrs) == vars(expected.attrs)
+    np.testing.assert_array_equal(group.data, expected.data)
+
+
+def test_read_ascii_fast_fallback(tmp_path):
+    """Files with a footer are left to larch."""
+    data_file = tmp_path / "scan.0001"
+    data_file.write_text("# energy mu\n1.0 2.0\n3.0 4.0\nscan aborted\n")
+    group = read_ascii_fast(data_file)
+    np.testing.assert_array_equal(group.data, [[1.0, 3.0], [2.0, 4.0]])
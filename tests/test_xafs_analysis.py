@@ -1,8 +1,10 @@
 import numpy as np
 import pytest
 from larch.symboltable import Group
+from larch.xafs import pre_edge
 
-from hollowfoot import XAFSAnalysis
+from hollowfoot import XAFSAnalysis, clear_caches
+from hollowfoot.xafs_analysis import map_groups, shares_grid
 
 
 @pytest.fixture()
@@ -31,3 +33,116 @@ def test_to_mu_missing_keys(group):
     )
     with pytest.raises(AttributeError):
         anl.calculate()
+
+
+def test_to_mu_mixed_lengths():
+    """Groups with different numbers of points get batched separately."""
+    groups = [
+        Group(energy=np.linspace(8320, 8350, num=n), It=np.full(n, 2.0), I0=np.ones(n))
+        for n in (5, 7, 5)
+    ]
+    anl = (
+        XAFSAnalysis(groups=groups)
+        .to_mu("energy", "It", "I0", is_transmission=True)
+        .calculate()
+    )
+    assert [len(grp.mu) for grp in anl.groups] == [5, 7, 5]
+    for grp, original in zip(anl.groups, groups):
+        np.testing.assert_allclose(grp.mu, -np.log(2.0))
+        # Energies are passed through, not copied
+        assert grp.energy is original.energy
+
+
+def test_map_groups():
+    """Are groups processed as copies, and returned in order?"""
+
+    def double(group, factor=2):
+        group.y = group.x * factor
+
+    groups = [Group(x=n) for n in range(20)]
+    new_groups = map_groups(double, groups, factor=3)
+    assert [grp.y for grp in new_groups] == [n * 3 for n in range(20)]
+    assert not any(hasattr(grp, "y") for grp in groups)
+
+
+def test_map_groups_shares_arrays():
+    def normalize(group):
+        group.norm = group.mu / group.mu.max()
+
+    (group,) = map_groups(normalize, [Group(mu=np.arange(1.0, 5.0), label="Ni")])
+    assert group.label == "Ni"
+    np.testing.assert_equal(group.norm, [0.25, 0.5, 0.75, 1])
+
+
+def test_is_flattened():
+    energy = np.linspace(8200, 8800, num=301)
+    group = Group(energy=energy, I0=np.ones_like(energy))
+    group.It = np.exp(-np.arctan((energy - 8333) / 5))
+    anl = XAFSAnalysis(groups=(group,))
+    assert not anl.is_flattened()
+    anl = anl.to_mu("energy", "It", "I0", is_transmission=True).calculate()
+    assert not anl.is_flattened()
+    anl = anl.fit_edge_jump().calculate()
+    assert anl.is_flattened()
+    # Still flattened after further operations
+    assert anl.subtract_background().is_flattened()
+
+
+def test_edge_fit_reused(monkeypatch):
+    """Is the edge fit from a shorter pipeline reused by a longer one?"""
+    calls = []
+
+    def counting_pre_edge(group, *args, **kwargs):
+        calls.append(group)
+        return pre_edge(group, *args, **kwargs)
+
+    monkeypatch.setattr("hollowfoot.xafs_analysis.pre_edge", counting_pre_edge)
+    clear_caches()
+    energy = np.linspace(8200, 8800, num=301)
+    group = Group(energy=energy, I0=np.ones_like(energy))
+    group.It = np.exp(-np.arctan((energy - 8333) / 5))
+    anl = XAFSAnalysis(groups=(group,)).to_mu(
+        "energy", "It", "I0", is_transmission=True
+    )
+    anl.fit_edge_jump().calculate()
+    assert len(calls) == 1
+    chik = anl.fit_edge_jump().subtract_background().calculate()
+    assert len(calls) == 1
+    assert hasattr(chik.groups[0], "chi")
+    # The reused edge fit is cached in turn, even with larch's journal attached
+    anl.fit_edge_jump().subtract_background().calculate()
+    assert len(calls) == 1
+
+
+def test_merge_shared_grid():
+    energy = np.linspace(8300, 8400, num=51)
+    groups = [Group(energy=energy, mu=np.sqrt(energy) * n) for n in (1, 2, 3)]
+    assert shares_grid(groups)
+    (merged,) = XAFSAnalysis(groups=groups).merge().calculate().groups
+    # Larch may trim the ends of the merged range
+    np.testing.assert_allclose(merged.mu, 2 * np.sqrt(merged.energy))
+
+
+def test_shares_grid():
+    groups = [
+        Group(energy=np.linspace(8300, 8400, num=51)),
+        Group(energy=np.linspace(8300, 8400, num=52)),
+    ]
+    assert not shares_grid(groups)
+
+
+def test_summarize(group, capsys):
+    XAFSAnalysis(groups=(group,)).to_mu("mono_energy", "It", "I0").summarize()
+    assert "- Calculate µ(E)" in capsys.readouterr().out
+
+
+def test_to_mu_float32(group):
+    anl = (
+        XAFSAnalysis(groups=(group,))
+        .to_mu("mono_energy", "It", "I0", is_transmission=True, dtype=np.float32)
+        .calculate()
+    )
+    mu = anl.groups[0].mu
+    assert mu.dtype == np.float32
+    np.testing.assert_allclose(mu, np.log(group.I0 / group.It), rtol=1e-6)
+    assert anl.groups[0].energy.dtype == np.float64
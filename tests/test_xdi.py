@@ -1,3 +1,6 @@
+import io
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
@@ -8,8 +11,11 @@ from hollowfoot.xdi import (
     Role,
     Token,
     XDIBackendEntrypoint,
+    XDIMalformed,
+    as_number,
     dump,
     load,
+    load_file,
     parse,
     tokenize,
     version_pattern,
@@ -40,6 +46,31 @@ def test_tokenizer():
     assert tokens[52].value == "8779.0"
 
 
+def test_tokenizer_file_object():
+    """Tokens can be read line-by-line from an open file."""
+    with open(xdi_path, mode="r") as fp:
+        expected = list(tokenize(fp.read()))
+    with open(xdi_path, mode="r") as fp:
+        tokens = list(tokenize(fp))
+    assert tokens == expected
+
+
+number_strings = [
+    # (text, value)
+    ("8333.0", 8333.0),
+    ("54893992", 54893992),
+    ("-1.3e-2", -0.013),
+    ("1E5", 1e5),
+    ("spam", np.nan),
+]
+
+
+@pytest.mark.parametrize("text,value", number_strings)
+def test_as_number(text, value):
+    number = as_number(text)
+    np.testing.assert_equal(number, value)
+
+
 version_lines = [
     # (text, number of versions)
     ("# Sample name: Blah blah", 0),
@@ -114,6 +145,47 @@ def test_parse_data():
     np.testing.assert_equal(dataset["It-net_count"].values, [54893992])
 
 
+def test_parse_data_without_labels():
+    tokens = [
+        Token("XDI/1.0", Role.VERSION),
+        Token("8333.0", Role.DATUM),
+    ]
+    with pytest.raises(XDIMalformed):
+        parse(tokens)
+    with pytest.raises(XDIMalformed):
+        parse(tokens[:1], data_array=np.ones((2, 2)))
+
+
+def test_parse_contiguous_columns():
+    tokens = [
+        Token("XDI/1.0", Role.VERSION),
+        Token("mono-energy", Role.COLUMN_LABEL),
+        Token("It-net_count", Role.COLUMN_LABEL),
+    ]
+    data = [Token(str(value), Role.DATUM) for value in range(6)]
+    dataset = parse([*tokens, *data])
+    np.testing.assert_equal(dataset["It-net_count"].values, [1.0, 3.0, 5.0])
+    assert dataset["It-net_count"].values.flags.c_contiguous
+    # A given data array is used without copying
+    data_array = np.arange(6.0).reshape(3, 2)
+    dataset = parse(tokens, data_array=data_array)
+    np.testing.assert_equal(dataset["It-net_count"].values, [1.0, 3.0, 5.0])
+    assert np.shares_memory(dataset["It-net_count"].values, data_array)
+
+
+def test_parse_incomplete_row():
+    tokens = [
+        Token("XDI/1.0", Role.VERSION),
+        Token("mono-energy", Role.COLUMN_LABEL),
+        Token("It-net_count", Role.COLUMN_LABEL),
+        Token("8333.0", Role.DATUM),
+        Token("54893992", Role.DATUM),
+        Token("8334.0", Role.DATUM),
+    ]
+    with pytest.raises(XDIMalformed):
+        parse(tokens)
+
+
 def test_load():
     with open(xdi_path, mode="r") as fp:
         dataset = load(fp.read())
@@ -121,6 +193,82 @@ def test_load():
     assert dataset.attrs["header"]["Facility.xray_source"] == "APS Undulator A"
 
 
+def test_load_matches_tokens():
+    """Does bulk-loading the data give the same result as parsing tokens?"""
+    with open(xdi_path, mode="r") as fp:
+        text = fp.read()
+    dataset = load(text)
+    expected = parse(tokenize(text))
+    xr.testing.assert_allclose(dataset, expected)
+    assert dataset.attrs == expected.attrs
+
+
+def test_load_crlf():
+    with open(xdi_path, mode="r") as fp:
+        text = fp.read()
+    dataset = load(text.replace("\n", "\r\n"))
+    expected = load(text)
+    xr.testing.assert_identical(dataset, expected)
+    assert dataset["energy"].shape == expected["energy"].shape
+
+
+def test_load_header_only():
+    text = "# XDI/1.0\n# -----\n# energy i0\n"
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        dataset = load(text)
+        file_dataset = load_file(io.StringIO(text))
+    assert dataset["energy"].shape == (0,)
+    xr.testing.assert_identical(file_dataset, dataset)
+
+
+def test_load_blank_lines():
+    """Blank lines may come before the column labels or data rows."""
+    text = "# XDI/1.0\n# -----\n\n# energy i0\n  \n  8333.0 12\n"
+    dataset = load(text)
+    np.testing.assert_equal(dataset["energy"].values, [8333.0])
+    np.testing.assert_equal(dataset["i0"].values, [12])
+    xr.testing.assert_identical(load_file(io.StringIO(text)), dataset)
+
+
+def test_load_integer_columns():
+    """Integer columns are read as floats, like the other columns."""
+    text = "# XDI/1.0\n# -----\n# energy i0\n  8333.0 12\n  8334.0 13\n"
+    dataset = load(text)
+    assert dataset["i0"].dtype == np.float64
+
+
+def test_load_malformed_number():
+    text = "# XDI/1.0\n# -----\n# energy i0\n  8333.0 12\n  8334.0 spam\n"
+    dataset = load(text)
+    np.testing.assert_equal(dataset["energy"].values, [8333.0, 8334.0])
+    np.testing.assert_equal(dataset["i0"].values, [12, np.nan])
+
+
+def test_load_float32():
+    with open(xdi_path, mode="r") as fp:
+        text = fp.read()
+    dataset = load(text, dtype=np.float32)
+    expected = load(text)
+    assert dataset["energy"].dtype == np.float32
+    assert dataset["i0"].dtype == np.float32
+    xr.testing.assert_allclose(dataset, expected.astype(np.float32))
+
+
+def test_load_file():
+    with open(xdi_path, mode="r") as fp:
+        expected = load(fp.read())
+    with open(xdi_path, mode="r") as fp:
+        dataset = load_file(fp)
+    xr.testing.assert_identical(dataset, expected)
+
+
+def test_load_file_malformed_number():
+    text = "# XDI/1.0\n# -----\n# energy i0\n  8333.0 12\n  8334.0 spam\n"
+    dataset = load_file(io.StringIO(text))
+    xr.testing.assert_identical(dataset, load(text))
+
+
 def test_xarray_plugin():
     assert XDIBackendEntrypoint().guess_can_open(xdi_path)
     dataset = xr.open_dataset(xdi_path)
@@ -128,6 +276,26 @@ def test_xarray_plugin():
     assert dataset.attrs["header"]["Facility.xray_source"] == "APS Undulator A"
 
 
+def test_xarray_plugin_drop_variables():
+    dataset = xr.open_dataset(xdi_path, drop_variables=["i0"])
+    assert "i0" not in dataset
+    assert "itrans" in dataset
+
+
+def test_xarray_plugin_dtype():
+    dataset = xr.open_dataset(xdi_path, dtype="float32")
+    assert dataset["itrans"].dtype == np.float32
+
+
+def test_xarray_plugin_threads():
+    """Files can be opened from several threads at once."""
+    expected = xr.open_dataset(xdi_path)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        datasets = list(executor.map(xr.open_dataset, [xdi_path] * 8))
+    for dataset in datasets:
+        xr.testing.assert_identical(dataset, expected)
+
+
 dataset = xr.Dataset(
     coords={
         "energy": np.linspace(8779, 8889, num=12),
@@ -222,3 +390,8 @@ def test_dump_sparse_dataset():
     )
     xdi = dump(sparse_dataset)
     assert xdi == "# XDI/1.0\n# -----\n#\n"
+
+
+def test_dump_round_trip():
+    new_dataset = load(dump(dataset))
+    xr.testing.assert_equal(new_dataset, dataset)